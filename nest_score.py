@@ -1,11 +1,22 @@
 import pandas as pd
 import numpy as np
-from typing import Dict
+from typing import Callable, Dict, Tuple
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pac
+except ImportError:  # Optional: fall back to the pandas CSV parser
+    pa = None
 
 # Configuration constants
 SUBJECT_COLS = ['Bio Marks', 'Chem Marks', 'Math Marks', 'Phy Marks']
 SMAS_MULTIPLIERS = {'GEN': 0.20, 'OBC': 0.18, 'SC': 0.10, 'ST': 0.10}
 PERCENTILE_CUTOFFS = {'OBC': 90, 'SC': 75, 'ST': 75}
+CAT_INDEX = {cat: i for i, cat in enumerate(SMAS_MULTIPLIERS)}  # Row order of the SMAS matrix
+
+# Missing-value markers recognised by pd.read_csv by default, so both CSV readers agree
+CSV_NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                 '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
 
 # Subject scaling configuration - adjust these as needed
 SUBJECT_SCALING = {
@@ -16,18 +27,36 @@ SUBJECT_SCALING = {
 }
 
 
+def _clean_categorical(values: pd.Series, fill: str, normalize: Callable[[pd.Index], pd.Index]) -> pd.Categorical:
+    """Fill, normalize and categorize a string column, touching each distinct value only once."""
+    codes, uniques = pd.factorize(values)
+
+    # Missing values get code -1, which picks the fill value appended last
+    raw = pd.Index(np.append(np.asarray(uniques, dtype=object), fill), dtype=object)
+    categories, inverse = np.unique(normalize(raw).to_numpy(dtype=str), return_inverse=True)
+    return pd.Categorical.from_codes(inverse[codes], categories)
+
+
 def load_and_clean_data(file_path: str) -> pd.DataFrame:
     """Load CSV and clean the data."""
-    df = pd.read_csv(file_path)
+    if pa is not None:
+        read_options = pac.ReadOptions(use_threads=True)
+        convert_options = pac.ConvertOptions(null_values=CSV_NA_VALUES, strings_can_be_null=True)
+        df = pac.read_csv(file_path, read_options=read_options, convert_options=convert_options).to_pandas()
+    else:
+        df = pd.read_csv(file_path)
     
     # Fill missing values
     df[SUBJECT_COLS] = df[SUBJECT_COLS].fillna(0)
-    df['PWD-Status'] = df['PWD-Status'].fillna('No').str.strip().str.lower()
-    df['JK-Status'] = df['JK-Status'].fillna('No').str.strip().str.lower()
-    df['Category'] = df['Category'].fillna('GEN').str.upper()
+
+    # Categorical columns compare on integer codes instead of strings
+    df['PWD-Status'] = _clean_categorical(df['PWD-Status'], 'No', lambda s: s.str.strip().str.lower())
+    df['JK-Status'] = _clean_categorical(df['JK-Status'], 'No', lambda s: s.str.strip().str.lower())
+    df['Category'] = _clean_categorical(df['Category'], 'GEN', lambda s: s.str.upper())
     
     return df
 
+
 def apply_subject_scaling(df: pd.DataFrame) -> pd.DataFrame:
     """Apply scaling to subject scores to normalize them to a standard maximum."""
     
@@ -40,45 +69,59 @@ def apply_subject_scaling(df: pd.DataFrame) -> pd.DataFrame:
         max_standard = SUBJECT_SCALING[subject]['max_standard']
         scaling_factor = max_standard / max_actual
         
-        # Create scaled column name for reference
-        scaled_col = f"{subject}_Scaled"
-        
         # Apply scaling only to positive scores
         # Negative scores remain unchanged (as per requirement)
-        df[scaled_col] = df[subject].apply(
-            lambda x: x * scaling_factor if x > 0 else x
-        )
-        
-        # Replace original column with scaled values
-        df[subject] = df[scaled_col]
-        
-        # Clean up the temporary scaled column
-        df.drop(columns=[scaled_col], inplace=True)
+        marks = df[subject].to_numpy()
+        df[subject] = np.where(marks > 0, marks * scaling_factor, marks)
         
         subject_name = subject.replace(' Marks', '')
         print(f"{subject_name:<12} {max_actual:<12} {max_standard:<11} {scaling_factor:<15.4f}")
     
     return df
 
+def _best3_and_max(marks: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Best-3 total and highest mark for each row of marks."""
+    ranked = np.sort(marks, axis=1)
+
+    # Add the top three largest first, so fractional totals round the same way for every candidate
+    total = ranked[:, -1] + ranked[:, -2] + ranked[:, -3]
+    return total, ranked[:, -1]
+
+
 def calculate_scores(df: pd.DataFrame) -> pd.DataFrame:
     """Calculate total marks (best 3 of 4) and max subject mark."""
-    marks = df[SUBJECT_COLS].values
-    sorted_marks = np.sort(marks, axis=1)[:, ::-1]  # Sort descending
-    
-    df['Total Marks'] = sorted_marks[:, :3].sum(axis=1)  # Sum top 3
-    df['Max Subject Mark'] = sorted_marks[:, 0]  # Highest mark
-    df['Percentile'] = ((df['Total Marks'].rank(method='min') - 1) / len(df)) * 100
+    df['Total Marks'], df['Max Subject Mark'] = _best3_and_max(df[SUBJECT_COLS].to_numpy())
+
+    # Percentile from min-rank: candidates with equal totals share the lowest position
+    totals = df['Total Marks'].to_numpy()
+    order = totals.argsort(kind='stable')
+    sorted_totals = totals[order]
+    new_block = np.ones(len(totals), dtype=bool)
+    new_block[1:] = sorted_totals[1:] != sorted_totals[:-1]
+    below = np.empty(len(totals), dtype=np.float64)
+    below[order] = np.maximum.accumulate(np.where(new_block, np.arange(len(totals)), 0))
+    df['Percentile'] = (below / len(df)) * 100
     
     return df
 
 
-def calculate_smas(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
+def calculate_smas(df: pd.DataFrame) -> Tuple[Dict[str, Dict[str, float]], np.ndarray]:
     """Calculate Subject-wise Minimum Admissible Score."""
     smas = {}
     
     for subject in SUBJECT_COLS:
-        top_100_avg = df[subject].nlargest(100).mean()
+        marks = df[subject].to_numpy()
+        top_n = min(100, len(marks))
+        if top_n:
+            # Sum the top slice in descending order so the mean rounds exactly as nlargest(100).mean() did
+            top = np.sort(np.partition(marks, -top_n)[-top_n:])[::-1]
+            top_100_avg = top.mean(dtype=np.float64)
+        else:
+            top_100_avg = np.nan
         smas[subject] = {cat: mult * top_100_avg for cat, mult in SMAS_MULTIPLIERS.items()}
+
+    # Same thresholds as a (category, subject) matrix for vectorized lookups
+    smas_matrix = np.array([[smas[subject][cat] for subject in SUBJECT_COLS] for cat in CAT_INDEX])
     
     # Print SMAS scores as a table
     print("\n=== SMAS SCORES ACROSS CATEGORIES ===")
@@ -89,90 +132,104 @@ def calculate_smas(df: pd.DataFrame) -> Dict[str, Dict[str, float]]:
         subject_name = subject.replace(' Marks', '')
         print(f"{subject_name:<12} {smas[subject]['GEN']:<8.2f} {smas[subject]['OBC']:<8.2f} {smas[subject]['SC']:<8.2f} {smas[subject]['ST']:<8.2f}")
     
-    return smas
+    return smas, smas_matrix
+
 
+def _category_index(df: pd.DataFrame) -> np.ndarray:
+    """Map each candidate's category to its CAT_INDEX row (unknown categories count as GEN)."""
+    categories = df['Category'].cat
+    lookup = np.array([CAT_INDEX.get(cat, CAT_INDEX['GEN']) for cat in categories.categories], dtype=np.intp)
+    return lookup[categories.codes.to_numpy()]
 
-def check_smas_qualification(df: pd.DataFrame, smas: Dict[str, Dict[str, float]]) -> pd.DataFrame:
+
+def check_smas_qualification(df: pd.DataFrame, smas_matrix: np.ndarray) -> pd.DataFrame:
     """Count qualified subjects for each candidate."""
-    def count_qualified(row):
-        category = row['Category'] if row['Category'] in SMAS_MULTIPLIERS else 'GEN'
-        multiplier = 0.5 if row['PWD-Status'] == 'yes' else 1.0
-        
-        count = 0
-        for subject in SUBJECT_COLS:
-            threshold = smas[subject][category] * multiplier
-            if row[subject] >= threshold:
-                count += 1
-        return count
-    
-    df['SMAS Qualified Subjects'] = df.apply(count_qualified, axis=1)
+    # Unknown categories fall back to GEN thresholds
+    thresholds = smas_matrix[_category_index(df)]
+
+    # PWD candidates get a 50% reduction
+    pwd_factor = np.where((df['PWD-Status'] == 'yes').to_numpy(), 0.5, 1.0)
+    thresholds = thresholds * pwd_factor[:, None]
+
+    df['SMAS Qualified Subjects'] = (df[SUBJECT_COLS].values >= thresholds).sum(axis=1)
     return df
 
 
-def assign_ranks(df: pd.DataFrame, mask: pd.Series, rank_col: str, prefix: str = "") -> pd.DataFrame:
+def _min_rank(total: np.ndarray, maxs: np.ndarray) -> np.ndarray:
+    """Min-rank of keys already sorted by total, then max subject mark (both descending)."""
+    # Candidates tied on both keys share the lowest position of their group
+    new_group = np.ones(len(total), dtype=bool)
+    new_group[1:] = (total[1:] != total[:-1]) | (maxs[1:] != maxs[:-1])
+    positions = np.arange(1, len(total) + 1)
+    return np.maximum.accumulate(np.where(new_group, positions, 0))
+
+
+def assign_ranks(df: pd.DataFrame, mask: np.ndarray, ranks_out: np.ndarray, order: np.ndarray,
+                 prefix: str = "") -> np.ndarray:
     """Assign ranks to qualified candidates with tie-breaking."""
-    if not mask.any():
-        return df
-    
-    qualified = df[mask].copy()
-    qualified = qualified.sort_values(['Total Marks', 'Max Subject Mark'], ascending=[False, False])
-    
-    # Calculate ranks with tie-breaking
-    ranks = qualified['Total Marks'].rank(method='min', ascending=False)
-    ties = qualified['Total Marks'].duplicated(keep=False)
-    
-    if ties.any():
-        for total_mark, group in qualified[ties].groupby('Total Marks'):
-            group_ranks = group['Max Subject Mark'].rank(method='min', ascending=False)
-            base_rank = ranks.loc[group.index].min()
-            ranks.loc[group.index] = base_rank + group_ranks - 1
-    
-    ranks = ranks.astype(int)
+    # `order` ranks the whole frame, so restricting it to the mask keeps rows best-first
+    rows = order[mask[order]]
+    if not len(rows):
+        return ranks_out
+    
+    total = df['Total Marks'].to_numpy()[rows]
+    mx = df['Max Subject Mark'].to_numpy()[rows]
+    ranks = _min_rank(total, mx)
     if prefix:
-        qualified[rank_col] = [f"{prefix}-{rank}" for rank in ranks]
+        ranks_out[rows] = np.char.add(f"{prefix}-", ranks.astype(str))
     else:
-        qualified[rank_col] = ranks
+        ranks_out[rows] = ranks
     
-    df.loc[mask, rank_col] = qualified[rank_col]
-    return df
+    return ranks_out
 
 
 def calculate_all_ranks(df: pd.DataFrame) -> pd.DataFrame:
     """Calculate all rank categories."""
-    # Initialize rank columns
-    for col in ['Gen-rank', 'Cat-rank', 'JK-rank', 'PWD-rank', 'EWS-rank']:
-        df[col] = pd.NA
-    
-    # We'll print qualified category numbers after rank assignment
-    
+    # Rank columns are filled positionally and attached once at the end
+    rank_cols = {col: np.full(len(df), None, dtype=object)
+                 for col in ['Gen-rank', 'Cat-rank', 'JK-rank', 'PWD-rank', 'EWS-rank']}
+    
+    # Raw arrays, extracted once
+    cat_idx = _category_index(df)
+    pct = df['Percentile'].values
+    qual = df['SMAS Qualified Subjects'].values >= 3
+    pwd = (df['PWD-Status'] == 'yes').to_numpy()
+    jk = (df['JK-Status'] == 'yes').to_numpy()
+
+    # Test each distinct category once, then gather by code (uppercased on load)
+    categories = df['Category'].cat
+    ews_lookup = np.array(['EWS' in cat for cat in categories.categories], dtype=bool)
+    ews = ews_lookup[categories.codes.to_numpy()]
+
     # Qualification masks
-    base_qual = (df['SMAS Qualified Subjects'] >= 3)
-    
-    masks = {
-        'gen_basic': base_qual & (df['Percentile'] >= 95),
-        'obc': base_qual & (df['Category'] == 'OBC') & (df['Percentile'] >= 90),
-        'sc': base_qual & (df['Category'] == 'SC') & (df['Percentile'] >= 75),
-        'st': base_qual & (df['Category'] == 'ST') & (df['Percentile'] >= 75),
-        'pwd': base_qual & (df['PWD-Status'] == 'yes') & (df['Percentile'] >= 75),
-        'ews': base_qual & df['Category'].str.contains('EWS', case=False, na=False) & (df['Percentile'] >= 95)
-    }
-    
+    cat_masks = {category: qual & (cat_idx == CAT_INDEX[category]) & (pct >= cutoff)
+                 for category, cutoff in PERCENTILE_CUTOFFS.items()}
+    pwd_mask = qual & pwd & (pct >= 75)
+    ews_mask = qual & ews & (pct >= 95)
+
     # General qualification combines all categories
-    gen_qual = masks['gen_basic'] | masks['obc'] | masks['sc'] | masks['st'] | masks['pwd']
-    masks['jk'] = (df['JK-Status'] == 'yes') & gen_qual
-    
+    gen_qual = (qual & (pct >= 95)) | pwd_mask
+    for cat_mask in cat_masks.values():
+        gen_qual |= cat_mask
+    jk_mask = jk & gen_qual
+
+    # Sort once by total, then max subject mark; every rank list reuses this order
+    order = np.lexsort((-df['Max Subject Mark'].to_numpy(), -df['Total Marks'].to_numpy()))
+
     # Assign ranks
-    df = assign_ranks(df, gen_qual, 'Gen-rank')
-    
+    assign_ranks(df, gen_qual, rank_cols['Gen-rank'], order)
+
     # Category ranks
-    for category, cutoff in PERCENTILE_CUTOFFS.items():
-        cat_mask = base_qual & (df['Category'] == category) & (df['Percentile'] >= cutoff)
-        df = assign_ranks(df, cat_mask, 'Cat-rank', category)
-    
+    for category, cat_mask in cat_masks.items():
+        assign_ranks(df, cat_mask, rank_cols['Cat-rank'], order, category)
+
     # Other ranks
-    df = assign_ranks(df, masks['ews'], 'EWS-rank', 'EWS')
-    df = assign_ranks(df, masks['pwd'], 'PWD-rank')
-    df = assign_ranks(df, masks['jk'], 'JK-rank')
+    assign_ranks(df, ews_mask, rank_cols['EWS-rank'], order, 'EWS')
+    assign_ranks(df, pwd_mask, rank_cols['PWD-rank'], order)
+    assign_ranks(df, jk_mask, rank_cols['JK-rank'], order)
+
+    for col, ranks in rank_cols.items():
+        df[col] = ranks
     
     return df
 
@@ -189,8 +246,8 @@ def process_exam_results(input_file: str = 'provisional.csv', output_file: str =
     df = calculate_scores(df)
     
     # Calculate SMAS and qualification
-    smas = calculate_smas(df)
-    df = check_smas_qualification(df, smas)
+    smas, smas_matrix = calculate_smas(df)
+    df = check_smas_qualification(df, smas_matrix)
     
     # Calculate ranks
     df = calculate_all_ranks(df)
@@ -199,30 +256,27 @@ def process_exam_results(input_file: str = 'provisional.csv', output_file: str =
     df['Percentile'] = df['Percentile'].round(4)
     df.to_csv(output_file, index=False)
     
-    # Print qualified candidates by category
+    # Rank totals, each counted once
+    rank_counts = {col: int(df[col].notna().sum())
+                   for col in ['Gen-rank', 'Cat-rank', 'EWS-rank', 'PWD-rank', 'JK-rank']}
 
-    qualified_mask = df['Gen-rank'].notna()
-    qualified_df = df[qualified_mask]
-    
-    obc_qualified = (qualified_df['Category'] == 'OBC').sum()
-    sc_qualified = (qualified_df['Category'] == 'SC').sum()
-    st_qualified = (qualified_df['Category'] == 'ST').sum()
-    gen_qualified = ((qualified_df['Category'] == 'GEN') | 
-                    (~qualified_df['Category'].isin(['OBC', 'SC', 'ST']))).sum()
+    # Qualified candidates by category; anything outside OBC/SC/ST counts as GEN
+    qualified_mask = df['Gen-rank'].notna().to_numpy()
+    cat_counts = np.bincount(_category_index(df)[qualified_mask], minlength=len(CAT_INDEX))
     
     # Print summary of qualified candidates
 
     print("\n=== FINAL SUMMARY ===")
     print(f"Total candidates : {len(df)}")
-    print(f"Total Merit ranks : {df['Gen-rank'].notna().sum()}")
-    print(f"Total Cat   ranks: {df['Cat-rank'].notna().sum()}")
-    print(f"EWS : {df['EWS-rank'].notna().sum()}")
-    print(f"PWD : {df['PWD-rank'].notna().sum()}")
-    print(f"JK  : {df['JK-rank'].notna().sum()}")
-    print(f"OBC : {obc_qualified}")
-    print(f"SC  : {sc_qualified}")
-    print(f"ST  : {st_qualified}")
-    print(f"GEN : {gen_qualified}")
+    print(f"Total Merit ranks : {rank_counts['Gen-rank']}")
+    print(f"Total Cat   ranks: {rank_counts['Cat-rank']}")
+    print(f"EWS : {rank_counts['EWS-rank']}")
+    print(f"PWD : {rank_counts['PWD-rank']}")
+    print(f"JK  : {rank_counts['JK-rank']}")
+    print(f"OBC : {cat_counts[CAT_INDEX['OBC']]}")
+    print(f"SC  : {cat_counts[CAT_INDEX['SC']]}")
+    print(f"ST  : {cat_counts[CAT_INDEX['ST']]}")
+    print(f"GEN : {cat_counts[CAT_INDEX['GEN']]}")
     
     return df
 